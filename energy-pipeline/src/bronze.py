@@ -3,7 +3,7 @@ from pathlib import Path
 from datetime import datetime, timezone
 import pandas as pd
 
-from config import ensure_dir, write_parquet
+from config import ensure_dir, open_raw, write_parquet
 
 
 class Bronze:
@@ -25,7 +25,18 @@ class Bronze:
         out_dir = ensure_dir(Path(src["output"]["dir"]))
         out_path = out_dir / src["output"]["name"]
 
-        input_df = self._read_input(src, in_path)
+        src_type = src.get("type")
+        compression = src["input"].get("compression", "infer")
+
+        # runs landed before a raw format change keep their original file
+        fallback = src["input"].get("fallback")
+        if not in_path.exists() and fallback:
+            print(f"{in_path} not found, falling back to {fallback['name']}")
+            in_path = in_dir / fallback["name"]
+            src_type = fallback.get("type", src_type)
+            compression = fallback.get("compression", "infer")
+
+        input_df = self._read_input(src_type, in_path, compression)
 
         output_df = self._organize_input(input_df, src)
 
@@ -33,28 +44,42 @@ class Bronze:
 
         return out_path
 
-    def _read_input(self, src: dict, in_path: Path) -> pd.DataFrame:
+    def _read_input(
+        self, src_type: str, in_path: Path, compression: str | None
+    ) -> pd.DataFrame:
         print("Reading input from:", in_path)
-        if src.get("type") == "csv":
-            df = self._read_csv(in_path)
-        elif src.get("type") == "json":
-            df = self._read_json(in_path)
+        if src_type == "csv":
+            df = self._read_csv(in_path, compression)
+        elif src_type == "json":
+            df = self._read_json(in_path, compression)
+        elif src_type == "ndjson":
+            df = self._read_ndjson(in_path, compression)
         else:
-            raise Exception(f"Unknown source type: {src.get('type')}")
+            raise Exception(f"Unknown source type: {src_type}")
         return df
 
     # ---------- CSV ----------
-    def _read_csv(self, in_path: Path) -> Path:
-        df = pd.read_csv(in_path, dtype=str)
+    def _read_csv(self, in_path: Path, compression: str | None) -> Path:
+        with open_raw(in_path, "rb", compression) as f:
+            df = pd.read_csv(f, dtype=str)
         return df
 
     # ---------- JSON ----------
-    def _read_json(self, in_path: Path):
-        with open(in_path, "r", encoding="utf-8") as f:
+    def _read_json(self, in_path: Path, compression: str | None):
+        with open_raw(in_path, "rt", compression) as f:
             records = json.load(f)
         df = pd.DataFrame(records).fillna("").astype(str)
         return df
 
+    # ---------- NDJSON ----------
+    def _read_ndjson(self, in_path: Path, compression: str | None):
+        # decompressed and parsed one line at a time; only the parsed records
+        # are kept, never the raw or decompressed file contents
+        with open_raw(in_path, "rt", compression) as f:
+            records = [json.loads(line) for line in f if line.strip()]
+        df = pd.DataFrame(records).fillna("").astype(str)
+        return df
+
     # ---------- Common functions ----------
     def _organize_input(self, df: pd.DataFrame, src: dict) -> pd.DataFrame:
         df = self._select_and_rename(df, src)
@@ -1,8 +1,13 @@
+import gzip
+import os
+import uuid
 from pathlib import Path
-from typing import Any, Dict
+from typing import IO, Any, Dict
 import yaml
 import pandas as pd
 
+from storage import is_fragment_table, read_table, write_fragment
+
 
 def load_yaml(path: str | Path) -> Dict[str, Any]:
     path = Path(path)
@@ -22,7 +27,50 @@ def ensure_dir(path: str | Path) -> Path:
         raise
 
 
+def read_parquet(in_path: Path) -> pd.DataFrame:
+    if is_fragment_table(in_path):
+        return read_table(in_path)
+    return pd.read_parquet(in_path)
+
+
+COMPRESSION_SUFFIXES = {".gz": "gzip", ".zst": "zstd"}
+
+
+def open_raw(path: Path, mode: str, compression: str | None = "infer") -> IO:
+    # Streams raw files through gzip/zstd; "infer" picks the codec from the suffix
+    suffix_compression = COMPRESSION_SUFFIXES.get(path.suffix)
+    if compression == "infer":
+        compression = suffix_compression
+    elif (compression or "none") != (suffix_compression or "none"):
+        raise ValueError(
+            f"compression={compression} does not match the file suffix of {path}"
+        )
+
+    encoding = "utf-8" if "t" in mode else None
+
+    if not compression or compression == "none":
+        return path.open(mode, encoding=encoding)
+
+    if compression == "gzip":
+        return gzip.open(path, mode, encoding=encoding)
+
+    if compression == "zstd":
+        try:
+            import zstandard
+        except ImportError as e:
+            raise ImportError(
+                "zstd compression requires the 'zstandard' package"
+            ) from e
+        return zstandard.open(path, mode, encoding=encoding)
+
+    raise Exception(f"Unknown compression: {compression}")
+
+
 def write_parquet(df: pd.DataFrame, out_path: Path, job: dict, level: str) -> None:
+    if job.get("output", {}).get("format", "file") == "fragments":
+        write_fragment(df, out_path, job, level)
+        return
+
     mode = job.get("output", {}).get("mode", "overwrite")
     merge_keys = job.get("output", {}).get("merge_keys", [])
 
@@ -31,7 +79,7 @@ def write_parquet(df: pd.DataFrame, out_path: Path, job: dict, level: str) -> No
     )
 
     if mode == "overwrite" or not out_path.exists():
-        df.to_parquet(out_path, index=False)
+        _replace_parquet(df, out_path, job)
         return
 
     if mode == "append":
@@ -43,12 +91,28 @@ def write_parquet(df: pd.DataFrame, out_path: Path, job: dict, level: str) -> No
         else:
             df_all = df_all.drop_duplicates(keep="last")
 
-        df_all.to_parquet(out_path, index=False)
+        _replace_parquet(df_all, out_path, job)
         return
 
     raise Exception(f"Unknown output mode: {mode}")
 
 
+def _replace_parquet(df: pd.DataFrame, out_path: Path, job: dict) -> None:
+    # Write next to the target and swap it in, so readers never see a partial file
+    kwargs = {}
+    row_group_size = job.get("output", {}).get("row_group_size")
+    if row_group_size:
+        kwargs["row_group_size"] = row_group_size
+
+    tmp_path = out_path.with_name(f".{out_path.name}.{uuid.uuid4().hex}.tmp")
+    try:
+        df.to_parquet(tmp_path, index=False, **kwargs)
+        os.replace(tmp_path, out_path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+
 def require_keys(d: Dict[str, Any], keys: list[str], ctx: str) -> None:
     missing = [k for k in keys if k not in d]
     if missing:
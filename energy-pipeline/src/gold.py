@@ -1,7 +1,13 @@
+import json
+import os
+import uuid
 from pathlib import Path
+from datetime import datetime, timezone
 import pandas as pd
 
-from config import ensure_dir, write_parquet
+from config import ensure_dir, read_parquet, write_parquet
+
+RUN_MARKER = "_last_run.json"
 
 
 class Gold:
@@ -14,8 +20,28 @@ class Gold:
         for src in self.cfg_gold.get("sources", []):
             out_path = self._process_job(src)
             results[src["id"]] = str(out_path)
+        self._commit_run(results)
         return results
 
+    def _commit_run(self, results: dict) -> None:
+        # Written last and swapped in atomically: readers (query.py) treat a new
+        # marker as "a new Gold run is committed" and drop their cached results
+        committed_at = datetime.now(timezone.utc).isoformat()
+        for out_dir in {Path(p).parent for p in results.values()}:
+            marker = {
+                "run_id": self.run_id,
+                "committed_at": committed_at,
+                "tables": {
+                    job_id: path
+                    for job_id, path in results.items()
+                    if Path(path).parent == out_dir
+                },
+            }
+            tmp_path = out_dir / f".{RUN_MARKER}.{uuid.uuid4().hex}.tmp"
+            with tmp_path.open("w", encoding="utf-8") as f:
+                json.dump(marker, f, indent=2)
+            os.replace(tmp_path, out_dir / RUN_MARKER)
+
     def _process_job(self, src: dict) -> Path:
         inputs = src.get("input", [])
         out_dir = ensure_dir(Path(src["output"]["dir"]))
@@ -37,7 +63,7 @@ class Gold:
             in_dir = ensure_dir(Path(inp["dir"]))
             in_path = in_dir / inp["name"]
             df_id = Path(inp["name"]).stem  # get filename without extension
-            dfs[df_id] = pd.read_parquet(in_path)
+            dfs[df_id] = read_parquet(in_path)
         return dfs
 
     def _apply_joins(
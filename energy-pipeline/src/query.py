@@ -0,0 +1,273 @@
+import argparse
+import json
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Optional
+from urllib.parse import urlparse
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.fs as pafs
+
+from config import load_yaml
+from gold import RUN_MARKER
+from storage import is_fragment_table, latest_manifest, read_table
+
+
+class GoldQuery:
+    # Hot tables stay open as memory-mapped Arrow datasets, so filters and
+    # projections are pushed down to Parquet and row groups are skipped using
+    # their min/max statistics. Results live in an LRU keyed by the Gold run
+    # that produced them, so a newly committed run invalidates them.
+
+    FILTER_OPERATORS = ("==", "!=", ">", "<", ">=", "<=", "in", "not in")
+    AGGREGATIONS = ("sum", "mean", "median", "min", "max", "count", "nunique")
+
+    def __init__(self, cfg_gold: dict, cache_size: int = 256):
+        self.tables = {
+            src["id"]: Path(src["output"]["dir"]) / src["output"]["name"]
+            for src in cfg_gold.get("sources", [])
+        }
+        self.cache_size = cache_size
+        self._fs = pafs.LocalFileSystem(use_mmap=True)
+        self._datasets: dict[str, tuple[Any, ds.Dataset]] = {}
+        self._results: OrderedDict[str, pd.DataFrame] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def query(
+        self,
+        table: str,
+        columns: Optional[list[str]] = None,
+        filters: Optional[list[dict]] = None,
+        group_by: Optional[list[str]] = None,
+        metrics: Optional[list[dict]] = None,
+    ) -> pd.DataFrame:
+        if table not in self.tables:
+            raise KeyError(f"Unknown Gold table: {table}")
+
+        if columns and group_by:
+            raise ValueError(
+                "columns cannot be combined with group_by; the result holds the "
+                "group_by columns and metrics"
+            )
+        for metric in metrics or []:
+            if metric.get("agg") not in self.AGGREGATIONS:
+                raise ValueError(f"Unknown metric agg: {metric.get('agg')}")
+
+        version = self._version(table)
+        key = json.dumps(
+            [table, version, columns, filters, group_by, metrics],
+            sort_keys=True,
+            default=str,
+        )
+
+        with self._lock:
+            if key in self._results:
+                self._results.move_to_end(key)
+                return self._results[key].copy()
+
+        df = self._execute(table, version, columns, filters or [], group_by, metrics)
+
+        with self._lock:
+            self._results[key] = df
+            while len(self._results) > self.cache_size:
+                self._results.popitem(last=False)
+        return df.copy()
+
+    def _execute(
+        self,
+        table: str,
+        version: Any,
+        columns: Optional[list[str]],
+        filters: list[dict],
+        group_by: Optional[list[str]],
+        metrics: Optional[list[dict]],
+    ) -> pd.DataFrame:
+        dataset = self._dataset(table, version)
+
+        needed = None
+        if group_by:
+            needed = list(group_by) + [m["column"] for m in metrics or []]
+        elif columns:
+            needed = list(columns)
+
+        expression = self._build_filter(dataset.schema, filters)
+        df = dataset.to_table(columns=needed, filter=expression).to_pandas()
+
+        if group_by:
+            df = self._apply_aggregation(df, group_by, metrics or [])
+        return df
+
+    def _dataset(self, table: str, version: Any) -> ds.Dataset:
+        with self._lock:
+            cached = self._datasets.get(table)
+            if cached and cached[0] == version:
+                return cached[1]
+
+        path = self.tables[table]
+        if is_fragment_table(path):
+            # merge-on-read tables are resolved once per version and kept in memory
+            dataset = ds.dataset(
+                pa.Table.from_pandas(read_table(path), preserve_index=False)
+            )
+        else:
+            dataset = ds.dataset(
+                str(path.resolve()), format="parquet", filesystem=self._fs
+            )
+
+        with self._lock:
+            self._datasets[table] = (version, dataset)
+        return dataset
+
+    def _version(self, table: str) -> Any:
+        path = self.tables[table]
+        if is_fragment_table(path):
+            manifest = latest_manifest(path)
+            if manifest is None:
+                raise FileNotFoundError(f"No committed snapshot for table: {path}")
+            return manifest["version"]
+
+        if not path.exists():
+            raise FileNotFoundError(f"Gold table not found: {path}")
+
+        # The table's own file is part of the version too: a run that fails
+        # before writing the marker may already have replaced some tables
+        version = [path.stat().st_mtime_ns, path.stat().st_size]
+        marker = path.parent / RUN_MARKER
+        if marker.exists():
+            version += [marker.stat().st_mtime_ns, marker.stat().st_size]
+        return version
+
+    def _build_filter(
+        self, schema: pa.Schema, filters: list[dict]
+    ) -> Optional[ds.Expression]:
+        expression = None
+        for filter_rule in filters:
+            column = filter_rule["column"]
+            operator_ = filter_rule["operator"]
+            value = filter_rule["value"]
+
+            if operator_ not in self.FILTER_OPERATORS:
+                raise ValueError(f"Unknown filter operator: {operator_}")
+
+            field = ds.field(column)
+            value_type = schema.field(column).type
+            if operator_ in ("in", "not in"):
+                values = pa.array(
+                    [self._to_scalar(v, value_type) for v in value], type=value_type
+                )
+                condition = field.isin(values)
+                if operator_ == "not in":
+                    condition = ~condition
+            else:
+                scalar = self._to_scalar(value, value_type)
+                condition = {
+                    "==": field == scalar,
+                    "!=": field != scalar,
+                    ">": field > scalar,
+                    "<": field < scalar,
+                    ">=": field >= scalar,
+                    "<=": field <= scalar,
+                }[operator_]
+
+            expression = condition if expression is None else expression & condition
+        return expression
+
+    def _to_scalar(self, value: Any, value_type: pa.DataType) -> pa.Scalar:
+        if pa.types.is_timestamp(value_type):
+            ts = pd.Timestamp(value)
+            if value_type.tz and ts.tzinfo is None:
+                ts = ts.tz_localize(value_type.tz)
+            return pa.scalar(ts, type=value_type)
+        return pa.scalar(value, type=value_type)
+
+    def _apply_aggregation(
+        self, df: pd.DataFrame, group_by: list[str], metrics: list[dict]
+    ) -> pd.DataFrame:
+        if not metrics:
+            raise ValueError("metrics are required when group_by is set")
+
+        agg_dict = {}
+        for metric in metrics:
+            metric_name = metric.get("name") or metric["column"]
+            agg_dict[metric_name] = (metric["column"], metric["agg"])
+
+        return df.groupby(group_by, dropna=False).agg(**agg_dict).reset_index()
+
+
+class _QueryHandler(BaseHTTPRequestHandler):
+    gold_query: GoldQuery
+
+    def do_GET(self) -> None:
+        if urlparse(self.path).path != "/tables":
+            self._send(404, {"error": f"Unknown path: {self.path}"})
+            return
+        tables = {name: str(path) for name, path in self.gold_query.tables.items()}
+        self._send(200, tables)
+
+    def do_POST(self) -> None:
+        if urlparse(self.path).path != "/query":
+            self._send(404, {"error": f"Unknown path: {self.path}"})
+            return
+
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            body = json.loads(self.rfile.read(length) or b"{}")
+            df = self.gold_query.query(
+                table=body["table"],
+                columns=body.get("columns"),
+                filters=body.get("filters"),
+                group_by=body.get("group_by"),
+                metrics=body.get("metrics"),
+            )
+        except (KeyError, ValueError, TypeError) as e:
+            self._send(400, {"error": str(e)})
+            return
+        except FileNotFoundError as e:
+            self._send(404, {"error": str(e)})
+            return
+        except Exception as e:
+            self._send(500, {"error": f"{type(e).__name__}: {e}"})
+            return
+
+        payload = df.to_json(orient="records", date_format="iso").encode("utf-8")
+        self._send_raw(200, payload)
+
+    def _send(self, status: int, body: Any) -> None:
+        self._send_raw(status, json.dumps(body).encode("utf-8"))
+
+    def _send_raw(self, status: int, payload: bytes) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+def serve(gold_query: GoldQuery, host: str = "127.0.0.1", port: int = 8765) -> None:
+    handler = type("QueryHandler", (_QueryHandler,), {"gold_query": gold_query})
+    server = ThreadingHTTPServer((host, port), handler)
+    print(f"Serving Gold queries on http://{host}:{port}")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serve queries over the Gold layer")
+    parser.add_argument("--config", default="energy-pipeline/configs/gold.yml")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--cache-size", type=int, default=256)
+    args = parser.parse_args()
+
+    gold_query = GoldQuery(load_yaml(args.config), cache_size=args.cache_size)
+    serve(gold_query, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
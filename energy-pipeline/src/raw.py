@@ -1,13 +1,14 @@
 import json
 import os
 import shutil
+import uuid
 from pathlib import Path
-from typing import Any, Dict
+from typing import IO, Any, Callable, Dict, Iterator
 from datetime import datetime, timedelta, timezone
 
 import requests
 
-from config import ensure_dir
+from config import ensure_dir, open_raw
 
 
 class RawExtractor:
@@ -58,8 +59,13 @@ class RawExtractor:
             raise FileNotFoundError(f"CSV input not found: {in_path}")
 
         output_path = output_dir / csv_cfg["output_filename"]
+        compression = csv_cfg.get("compression", "infer")
 
-        shutil.copyfile(in_path, output_path)
+        def write(dst: IO) -> None:
+            with in_path.open("rb") as src:
+                shutil.copyfileobj(src, dst)
+
+        self._land(output_path, "wb", compression, write)
         return output_path
 
     def _ingest_api(self, output_dir: Path, api_cfg: Dict[str, Any]) -> Path:
@@ -88,18 +94,80 @@ class RawExtractor:
         for i, col in enumerate(data_columns):
             params[f"data[{i}]"] = col
 
-        try:
-            session = requests.Session()
-            response = session.get(api_cfg["base_url"], params=params, timeout=60)
-            response.raise_for_status()
-        except requests.RequestException as e:
-            raise requests.RequestException(f"API request failed: {e}") from e
-
-        try:
-            response_json = response.json()
-        except ValueError as e:
-            raise ValueError("API did not return valid JSON") from e
+        # offset paging is only consistent if every page sees the same row order
+        sort = api_cfg.get("sort", [])
+        if api_cfg.get("page_size") and not sort:
+            raise ValueError(
+                f"API source '{api_cfg['name']}' sets page_size but no sort"
+            )
+        for i, sort_cfg in enumerate(sort):
+            params[f"sort[{i}][column]"] = sort_cfg["column"]
+            params[f"sort[{i}][direction]"] = sort_cfg.get("direction", "asc")
+
+        output_format = api_cfg.get("format", "json")
+        compression = api_cfg.get("compression", "infer")
+        pages = self._fetch_pages(api_cfg["base_url"], params, api_cfg.get("page_size"))
+
+        def write(f: IO) -> None:
+            if output_format == "json":
+                records = [record for page in pages for record in page]
+                json.dump(records, f, ensure_ascii=False)
+            elif output_format == "ndjson":
+                # one record per line, written page by page as the API responds
+                for page in pages:
+                    for record in page:
+                        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            else:
+                raise Exception(f"Unknown raw api format: {output_format}")
 
-        with output_path.open("w", encoding="utf-8") as f:
-            json.dump(response_json["response"]["data"], f, ensure_ascii=False)
+        self._land(output_path, "wt", compression, write)
         return output_path
+
+    def _land(
+        self,
+        output_path: Path,
+        mode: str,
+        compression: str | None,
+        write: Callable[[IO], None],
+    ) -> None:
+        # Written under a temp name and renamed on success, so a failed
+        # extraction never leaves a truncated raw file for Bronze to load
+        tmp_path = output_path.with_name(f".{uuid.uuid4().hex}.{output_path.name}")
+        try:
+            with open_raw(tmp_path, mode, compression) as f:
+                write(f)
+            os.replace(tmp_path, output_path)
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
+
+    def _fetch_pages(
+        self, base_url: str, params: Dict[str, Any], page_size: int | None
+    ) -> Iterator[list[dict]]:
+        session = requests.Session()
+        params = dict(params)
+        offset = 0
+
+        while True:
+            if page_size:
+                params["offset"] = offset
+                params["length"] = page_size
+
+            try:
+                response = session.get(base_url, params=params, timeout=60)
+                response.raise_for_status()
+            except requests.RequestException as e:
+                raise requests.RequestException(f"API request failed: {e}") from e
+
+            try:
+                response_json = response.json()
+            except ValueError as e:
+                raise ValueError("API did not return valid JSON") from e
+
+            data = response_json["response"]["data"]
+            yield data
+
+            offset += len(data)
+            total = int(response_json["response"].get("total", offset))
+            if not page_size or not data or offset >= total:
+                return
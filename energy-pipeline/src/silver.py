@@ -4,7 +4,7 @@ import operator
 
 import pandas as pd
 
-from config import ensure_dir, write_parquet
+from config import ensure_dir, read_parquet, write_parquet
 
 
 class Silver:
@@ -26,7 +26,7 @@ class Silver:
         out_dir = ensure_dir(Path(src["output"]["dir"]))
         out_path = out_dir / src["output"]["name"]
 
-        df = pd.read_parquet(in_path)
+        df = read_parquet(in_path)
 
         df = self._apply_mappings(df, src.get("mappings", []))
         df = self._apply_aggregation(df, src.get("aggregation", {}))
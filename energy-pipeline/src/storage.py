@@ -0,0 +1,330 @@
+import json
+import os
+import random
+import shutil
+import time
+import uuid
+from pathlib import Path
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Optional
+
+import pandas as pd
+
+# A "fragments" table lives in a directory next to its logical parquet path
+# (e.g. silver/world_generation.parquet -> silver/world_generation/):
+#   fragments/<uuid>.parquet   immutable data files, never rewritten
+#   _manifests/<version>.json  committed snapshots, one file per version
+# Writers only add new files, so several sources/processes can write the same
+# table at once and a crash can never leave a half-written table behind.
+
+FRAGMENTS_DIR = "fragments"
+MANIFESTS_DIR = "_manifests"
+MAX_COMMIT_RETRIES = 100
+COMMIT_BACKOFF_SECONDS = 0.05
+MANIFEST_RETENTION = 10
+VACUUM_GRACE_SECONDS = 3600
+COMMIT_HISTORY = 100
+
+
+class CommitConflict(Exception):
+    pass
+
+
+def table_dir(path: Path) -> Path:
+    return path.with_suffix("")
+
+
+def is_fragment_table(path: Path) -> bool:
+    return (table_dir(path) / MANIFESTS_DIR).is_dir()
+
+
+def latest_manifest(path: Path) -> Optional[Dict[str, Any]]:
+    manifests_dir = table_dir(path) / MANIFESTS_DIR
+    if not manifests_dir.is_dir():
+        return None
+
+    versions = [int(p.stem) for p in manifests_dir.glob("*.json") if p.stem.isdigit()]
+    if not versions:
+        return None
+
+    manifest_path = manifests_dir / f"{max(versions):08d}.json"
+    with manifest_path.open("r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def read_table(path: Path, manifest: Optional[Dict[str, Any]] = None) -> pd.DataFrame:
+    manifest = manifest or latest_manifest(path)
+    if manifest is None:
+        raise FileNotFoundError(f"No committed snapshot for table: {path}")
+
+    root = table_dir(path)
+    fragments = manifest["fragments"]
+    if not fragments:
+        return pd.DataFrame()
+
+    dfs = [pd.read_parquet(root / f) for f in fragments]
+    if len(dfs) == 1:
+        return dfs[0]
+
+    # Merge on read: fragments are ordered by commit, so keep="last" gives the
+    # same result as the old read-modify-write append.
+    df = pd.concat(dfs, ignore_index=True)
+    merge_keys = manifest.get("merge_keys", [])
+    if merge_keys:
+        return df.drop_duplicates(subset=merge_keys, keep="last", ignore_index=True)
+    return df.drop_duplicates(keep="last", ignore_index=True)
+
+
+def write_fragment(df: pd.DataFrame, out_path: Path, job: dict, level: str) -> None:
+    output_cfg = job.get("output", {})
+    mode = output_cfg.get("mode", "overwrite")
+    merge_keys = output_cfg.get("merge_keys", [])
+    compact_after = output_cfg.get("compact_after")
+
+    if mode not in ("overwrite", "append"):
+        raise Exception(f"Unknown output mode: {mode}")
+
+    root = table_dir(out_path)
+    print(
+        f"Writing {level} fragment to {root} with mode={mode} and merge_keys={merge_keys}"
+    )
+
+    base = latest_manifest(out_path)
+    # newest version already checked for merge_keys conflicts with this write
+    verified = {"version": base["version"] if base else 0}
+
+    legacy = []
+    if mode == "append" and base is None:
+        legacy = _bootstrap_fragments(out_path)
+
+    fragment = _add_fragment(df, root)
+    own_keys = (
+        df[merge_keys].drop_duplicates() if mode == "append" and merge_keys else None
+    )
+
+    def build(current: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        if current is None:
+            fragments = legacy
+        else:
+            if own_keys is not None:
+                _check_conflicts(out_path, current, verified["version"], own_keys)
+                verified["version"] = current["version"]
+            fragments = current["fragments"] if mode == "append" else []
+        history = (current or {}).get("history", []) + [
+            {"version": (current or {}).get("version", 0) + 1, "added": [fragment]}
+        ]
+        return {
+            "fragments": fragments + [fragment],
+            "merge_keys": merge_keys,
+            "history": history[-COMMIT_HISTORY:],
+        }
+
+    try:
+        manifest = _commit(out_path, build, job.get("id", level))
+    except Exception:
+        (root / fragment).unlink(missing_ok=True)
+        raise
+
+    if legacy and manifest["fragments"][: len(legacy)] == legacy:
+        _retire_legacy_file(out_path)
+
+    if compact_after and len(manifest["fragments"]) > compact_after:
+        compact_table(out_path, job.get("id", level))
+
+    vacuum_table(out_path)
+
+
+def compact_table(path: Path, writer: str) -> None:
+    snapshot = latest_manifest(path)
+    if snapshot is None or len(snapshot["fragments"]) <= 1:
+        return
+
+    root = table_dir(path)
+    compacted = snapshot["fragments"]
+    fragment = _add_fragment(read_table(path, snapshot), root)
+
+    def build(current: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        # Appends committed meanwhile are kept on top of the compacted file;
+        # give up only if the compacted fragments are no longer the table's
+        # prefix (e.g. an overwrite or another compaction replaced them).
+        if current is None or current["fragments"][: len(compacted)] != compacted:
+            return None
+        return {
+            "fragments": [fragment] + current["fragments"][len(compacted) :],
+            "merge_keys": current.get("merge_keys", []),
+            "history": current.get("history", []),
+        }
+
+    try:
+        manifest = _commit(path, build, f"{writer}:compaction")
+    except Exception as e:
+        (root / fragment).unlink(missing_ok=True)
+        print(f"Compaction of {root} failed: {e}")
+        return
+
+    if manifest is None:
+        (root / fragment).unlink(missing_ok=True)
+        print(f"Skipped compaction of {root}: compacted fragments were replaced")
+
+
+def _check_conflicts(
+    path: Path, current: Dict[str, Any], base_version: int, own_keys: pd.DataFrame
+) -> None:
+    # Optimistic concurrency: a writer that lost the race may only rebase if
+    # no append committed since its base version touched the same merge_keys.
+    if current["version"] == base_version:
+        return
+
+    history = current.get("history", [])
+    if not history or history[0]["version"] > base_version + 1:
+        raise CommitConflict(
+            f"Cannot verify commits to {table_dir(path)} since version {base_version}"
+        )
+
+    merge_keys = list(own_keys.columns)
+    for entry in history:
+        if entry["version"] <= base_version:
+            continue
+        for fragment in entry["added"]:
+            try:
+                other = pd.read_parquet(table_dir(path) / fragment, columns=merge_keys)
+            except FileNotFoundError as e:
+                raise CommitConflict(
+                    f"Fragment {fragment} of {table_dir(path)} is gone, cannot verify"
+                ) from e
+            if not own_keys.merge(other.drop_duplicates(), on=merge_keys).empty:
+                raise CommitConflict(
+                    f"Version {entry['version']} of {table_dir(path)} wrote the same "
+                    f"merge_keys {merge_keys} since version {base_version}"
+                )
+
+
+def vacuum_table(path: Path) -> None:
+    # Drop manifests beyond the retention window, then every fragment none of
+    # the retained manifests points to. Recent files are spared: they may
+    # belong to a writer that has not committed yet.
+    root = table_dir(path)
+    manifests_dir = root / MANIFESTS_DIR
+    fragments_dir = root / FRAGMENTS_DIR
+
+    versions = sorted(
+        int(p.stem) for p in manifests_dir.glob("*.json") if p.stem.isdigit()
+    )
+    for version in versions[:-MANIFEST_RETENTION]:
+        (manifests_dir / f"{version:08d}.json").unlink(missing_ok=True)
+
+    referenced = set()
+    for version in versions[-MANIFEST_RETENTION:]:
+        try:
+            with (manifests_dir / f"{version:08d}.json").open(
+                "r", encoding="utf-8"
+            ) as f:
+                referenced.update(json.load(f)["fragments"])
+        except FileNotFoundError:
+            # removed by a concurrent vacuum; its fragments are older than ours
+            continue
+
+    cutoff = time.time() - VACUUM_GRACE_SECONDS
+    removed = 0
+    for fragment_path in fragments_dir.glob("*"):
+        fragment = f"{FRAGMENTS_DIR}/{fragment_path.name}"
+        try:
+            # other writers rename temp files and drop lost compactions meanwhile
+            if fragment in referenced or fragment_path.stat().st_mtime > cutoff:
+                continue
+        except FileNotFoundError:
+            continue
+        fragment_path.unlink(missing_ok=True)
+        removed += 1
+
+    if removed:
+        print(f"Vacuumed {removed} unreferenced fragments from {root}")
+
+
+def _add_fragment(df: pd.DataFrame, root: Path) -> str:
+    fragments_dir = root / FRAGMENTS_DIR
+    fragments_dir.mkdir(parents=True, exist_ok=True)
+
+    name = f"{datetime.now(timezone.utc).strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex}.parquet"
+    df.to_parquet(fragments_dir / name, index=False)
+    return f"{FRAGMENTS_DIR}/{name}"
+
+
+def _bootstrap_fragments(out_path: Path) -> list[str]:
+    # Carry over a table previously written as a single parquet file. The copy
+    # goes to a private temp name and is renamed into place, so a concurrent
+    # writer never sees (or commits) a half-copied fragment.
+    fragments_dir = table_dir(out_path) / FRAGMENTS_DIR
+    fragments_dir.mkdir(parents=True, exist_ok=True)
+    name = f"legacy_{out_path.name}"
+
+    tmp_path = fragments_dir / f".{uuid.uuid4().hex}.tmp"
+    try:
+        shutil.copyfile(out_path, tmp_path)
+    except FileNotFoundError:
+        # no legacy file, or another writer already migrated and retired it
+        return []
+    os.replace(tmp_path, fragments_dir / name)
+    return [f"{FRAGMENTS_DIR}/{name}"]
+
+
+def _retire_legacy_file(out_path: Path) -> None:
+    # Its rows now live in the legacy fragment; leaving it would go stale
+    out_path.unlink(missing_ok=True)
+    print(f"Migrated {out_path} into fragment table {table_dir(out_path)}")
+
+
+def _commit(
+    path: Path,
+    build: Callable[[Optional[Dict[str, Any]]], Optional[Dict[str, Any]]],
+    writer: str,
+) -> Optional[Dict[str, Any]]:
+    manifests_dir = table_dir(path) / MANIFESTS_DIR
+    manifests_dir.mkdir(parents=True, exist_ok=True)
+
+    for attempt in range(MAX_COMMIT_RETRIES):
+        if attempt:
+            # jittered backoff, so writers that lost a race do not collide again
+            time.sleep(random.uniform(0, COMMIT_BACKOFF_SECONDS * attempt))
+        current = latest_manifest(path)
+        manifest = build(current)
+        if manifest is None:
+            return None
+
+        version = current["version"] + 1 if current else 1
+        manifest["version"] = version
+        manifest["committed_at"] = datetime.now(timezone.utc).isoformat()
+        manifest["writer"] = writer
+
+        tmp_path = manifests_dir / f".{uuid.uuid4().hex}.tmp"
+        with tmp_path.open("w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+
+        # os.link fails if the target exists, so exactly one writer wins each
+        # version and readers only ever see complete manifests.
+        manifest_path = manifests_dir / f"{version:08d}.json"
+        try:
+            os.link(tmp_path, manifest_path)
+        except FileExistsError:
+            print(
+                f"Manifest version {version} of {table_dir(path)} taken, retrying commit"
+            )
+            continue
+        finally:
+            tmp_path.unlink(missing_ok=True)
+
+        # A writer that read a stale snapshot can claim a version slot vacuum
+        # already freed; anything newer means that commit would never be read.
+        if latest_manifest(path)["version"] > version:
+            manifest_path.unlink(missing_ok=True)
+            print(f"Manifest version {version} of {table_dir(path)} is stale, retrying")
+            continue
+
+        print(f"Committed version {version} of {table_dir(path)} by {writer}")
+        return manifest
+
+    raise Exception(
+        f"Could not commit to {path} after {MAX_COMMIT_RETRIES} concurrent retries"
+    )